@@ -1,13 +1,16 @@
 import os
 from dotenv import load_dotenv
-from typing import List, Dict
+from typing import List, Dict, Any
 
 # Load environment variables from .env file
 load_dotenv()
 
+# LLM backend: "openai", or "fake" for local testing without an API key
+LLM_PROVIDER = os.getenv("LLM_PROVIDER", "openai").lower()
+
 # Get API key from environment variables
 openai_api_key = os.getenv("OPENAI_API_KEY")
-if not openai_api_key:
+if not openai_api_key and LLM_PROVIDER == "openai":
     raise ValueError("OPENAI_API_KEY not found in environment variables")
 
 # Investment advisor questions organized by categories
@@ -101,5 +104,107 @@ INVESTMENT_QUESTIONS: Dict[str, List[str]] = {
     ]
 }
 
+# Profile field filled by each question, in the same order as INVESTMENT_QUESTIONS
+QUESTION_FIELDS: Dict[str, List[str]] = {
+    "personal_info": ["gender", "age", "marital_status", "expected_changes", "country"],
+    "investment_experience": ["experience", "alternative_investments"],
+    "current_financial_status": [
+        "monthly_income",
+        "monthly_expenses",
+        "monthly_savings",
+        "financial_liabilities",
+        "immediate_investment",
+        "monthly_investment"
+    ],
+    "financial_security": ["emergency_fund", "months_coverage"],
+    "current_investments": ["existing_investments", "invested_percentage"],
+    "short_term_goals": ["goals", "amounts_needed", "timeline_flexibility"],
+    "mid_term_goals": ["goals", "amounts_needed", "timing_importance"],
+    "goal_prioritization": ["main_goals", "priority_ranking", "mandatory_goals"],
+    "risk_profile": [
+        "profit_vs_preservation",
+        "risk_tolerance",
+        "decline_reaction",
+        "acceptable_loss",
+        "market_drop_reaction"
+    ],
+    "investment_preferences": [
+        "investment_duration",
+        "future_expenses",
+        "liquidity_importance",
+        "illiquid_assets"
+    ],
+    "restrictions": [
+        "ethical_restrictions",
+        "preferred_industries",
+        "legal_restrictions",
+        "personal_preferences"
+    ],
+    "investment_instruments": [
+        "international_access",
+        "available_instruments",
+        "preferred_industries",
+        "geographic_focus",
+        "tax_efficiency"
+    ],
+    "success_metrics": [
+        "success_definition",
+        "return_expectations",
+        "review_frequency",
+        "life_events",
+        "management_style"
+    ]
+}
+
+# Follow-up questions that only apply depending on an earlier answer.
+# category -> field -> rule; the question is skipped when the yes/no reading of
+# the answer to rule["category"]/rule["field"] equals rule["skip_if"].
+QUESTION_CONDITIONS: Dict[str, Dict[str, Dict[str, Any]]] = {
+    "investment_experience": {
+        "alternative_investments": {"category": "investment_experience", "field": "experience", "skip_if": False}
+    },
+    "financial_security": {
+        "months_coverage": {"category": "financial_security", "field": "emergency_fund", "skip_if": False}
+    },
+    "current_investments": {
+        "invested_percentage": {"category": "current_investments", "field": "existing_investments", "skip_if": False}
+    },
+    "short_term_goals": {
+        "amounts_needed": {"category": "short_term_goals", "field": "goals", "skip_if": False},
+        "timeline_flexibility": {"category": "short_term_goals", "field": "goals", "skip_if": False}
+    },
+    "mid_term_goals": {
+        "amounts_needed": {"category": "mid_term_goals", "field": "goals", "skip_if": False},
+        "timing_importance": {"category": "mid_term_goals", "field": "goals", "skip_if": False}
+    }
+}
+
+# Value stored for profile fields whose question was skipped
+SKIPPED_ANSWER = "Skipped (not applicable)"
+
+# Categories whose answers drive the asset allocation in the generated strategy.
+# Once all of them are answered, strategy generation may start speculatively.
+STRATEGY_INPUT_CATEGORIES: List[str] = [
+    "personal_info",
+    "investment_experience",
+    "current_financial_status",
+    "financial_security",
+    "short_term_goals",
+    "goal_prioritization",
+    "risk_profile",
+    "investment_preferences"
+]
+
+# Start drafting the strategy in the background before the questionnaire ends.
+# The draft only covers the sections derived from the categories above and is reused
+# on the final turn if they are unchanged; the remaining sections are then written
+# from the full profile, so later answers such as restrictions are still included.
+SPECULATIVE_STRATEGY = os.getenv("SPECULATIVE_STRATEGY", "false").lower() == "true"
+
+# Worker threads for strategies needed on a final turn, and for speculative drafts.
+# Drafts use their own pool so they never queue ahead of final turns.
+STRATEGY_WORKERS = int(os.getenv("STRATEGY_WORKERS", "40"))
+SPECULATIVE_STRATEGY_WORKERS = int(os.getenv("SPECULATIVE_STRATEGY_WORKERS", "8"))
+
 # Store active threads
 active_threads = {} 
\ No newline at end of file
@@ -1,6 +1,8 @@
-from fastapi import FastAPI
-from app.models import ChatMessage
+from fastapi import FastAPI, WebSocket
+from app.models import ChatMessage, AllocationRequest
 from app.services.chat_service import process_chat, get_thread_history
+from app.services.allocation_service import compute_allocations
+from app.services.websocket_service import handle_chat_websocket
 
 app = FastAPI()
 
@@ -13,7 +15,17 @@ def read_root():
 def chat(chat_message: ChatMessage):
     return process_chat(chat_message)
 
+# WebSocket chat endpoint for persistent sessions
+@app.websocket("/ws/chat/{thread_id}")
+async def chat_websocket(websocket: WebSocket, thread_id: str):
+    await handle_chat_websocket(websocket, thread_id)
+
 # Get thread history endpoint
 @app.get("/thread/{thread_id}")
 def thread_history(thread_id: str):
-    return get_thread_history(thread_id) 
\ No newline at end of file
+    return get_thread_history(thread_id) 
+
+# Risk score and target allocation endpoint
+@app.post("/allocation")
+def allocation(allocation_request: AllocationRequest):
+    return {"allocations": compute_allocations(allocation_request.profiles)}
\ No newline at end of file
@@ -1,3 +1,4 @@
+from concurrent.futures import Future
 from pydantic import BaseModel
 from typing import List, Optional, Dict, Any
 
@@ -7,6 +8,10 @@ class ChatMessage(BaseModel):
     message: str
     thread_id: Optional[str] = None
 
+# Define the allocation request model
+class AllocationRequest(BaseModel):
+    profiles: List[Dict[str, Dict[str, Any]]]
+
 # Define the message history model
 class MessageHistory:
     def __init__(self):
@@ -99,4 +104,8 @@ class MessageHistory:
         self.current_category: Optional[str] = None
         self.current_question: Optional[str] = None
         self.profile_complete: bool = False
-        self.strategy_generated: bool = False 
\ No newline at end of file
+        self.strategy_generated: bool = False
+        self.strategy: Optional[str] = None
+        # Speculative strategy draft and the allocation inputs it was started with
+        self.strategy_draft: Optional[Future] = None
+        self.strategy_inputs: Optional[str] = None 
\ No newline at end of file
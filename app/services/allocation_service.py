@@ -0,0 +1,223 @@
+import re
+from datetime import date
+import numpy as np
+from typing import Any, Dict, List, Optional
+from app.config import SKIPPED_ANSWER
+from app.utils import parse_amount, parse_yes_no
+
+# Asset classes of the target allocation
+ASSET_CLASSES: List[str] = ["stocks", "bonds", "real_estate", "commodities", "cash"]
+
+# Model portfolios (percent) at risk score 0 and 100; scores in between are interpolated
+CONSERVATIVE_PORTFOLIO = np.array([20.0, 55.0, 5.0, 5.0, 15.0])
+AGGRESSIVE_PORTFOLIO = np.array([80.0, 5.0, 10.0, 5.0, 0.0])
+
+# Cash floor (percent) for clients without an emergency fund
+EMERGENCY_CASH_FLOOR = 10.0
+
+# Risk features, each scaled to 0 (lowest risk capacity) .. 1 (highest), with their weights
+FEATURES: List[str] = [
+    "age",
+    "experience",
+    "savings_rate",
+    "emergency_fund",
+    "short_term_goals",
+    "profit_vs_preservation",
+    "risk_tolerance",
+    "decline_reaction",
+    "acceptable_loss",
+    "market_drop_reaction",
+    "investment_horizon",
+    "future_expenses",
+    "liquidity_importance",
+    "illiquid_assets"
+]
+FEATURE_WEIGHTS = np.array([1.5, 0.5, 0.5, 0.5, 0.5, 1.0, 2.0, 1.0, 1.5, 1.0, 2.0, 0.5, 0.5, 0.5])
+
+# Negation shortly before a keyword ("would not sell", "wouldn't panic")
+NEGATION = re.compile(r"\b(?:not|no|never|without)\b|n't\b")
+
+def _is_negated(text: str, position: int) -> bool:
+    """Check the last few words of the keyword's clause for a negation."""
+    clause = re.split(r"[,.;!?]|\bbut\b", text[:position])[-1]
+    return bool(NEGATION.search(" ".join(clause.split()[-3:])))
+
+def _keyword_score(answer: Any, keywords: Dict[str, float], negated: Optional[Dict[str, float]] = None) -> Optional[float]:
+    """
+    Score an answer by the keyword that appears first in it.
+    Negated keywords are only used when nothing else matches, scored from
+    `negated` ("would not sell" reads as holding) or ignored if absent from it.
+    """
+    if not isinstance(answer, str):
+        return None
+    answer_lower = answer.lower().replace("\u2019", "'")
+    
+    matches, negated_matches = [], []
+    for keyword, score in keywords.items():
+        for match in re.finditer(r"\b" + re.escape(keyword), answer_lower):
+            if not _is_negated(answer_lower, match.start()):
+                matches.append((match.start(), score))
+            elif negated and keyword in negated:
+                negated_matches.append((match.start(), negated[keyword]))
+    
+    matches = matches or negated_matches
+    return min(matches)[1] if matches else None
+
+def _yes_no_score(answer: Any, yes: float = 1.0) -> Optional[float]:
+    """Score a yes/no answer; `yes` is the score of a positive answer."""
+    if not isinstance(answer, str):
+        return None
+    parsed = parse_yes_no(answer)
+    if parsed is None:
+        return None
+    return yes if parsed else 1.0 - yes
+
+def _amount(answer: Any) -> Optional[float]:
+    """Read a number from a text or numeric answer (API clients may send 34 instead of "34")."""
+    if isinstance(answer, bool):
+        return None
+    if isinstance(answer, (int, float)):
+        return float(answer)
+    return parse_amount(answer) if isinstance(answer, str) else None
+
+def _horizon_years(answer: Any) -> Optional[float]:
+    """
+    Read an investment horizon in years from an answer like '10 years', 'until 2045'
+    or 'long-term'. Numeric answers are taken as years.
+    """
+    if not isinstance(answer, str):
+        return _amount(answer)
+    answer_lower = answer.lower()
+    amount = parse_amount(answer_lower)
+    if amount is not None and 1900 <= amount < 2100:
+        # A calendar year ("retirement in 2045") rather than a number of years
+        amount = amount - date.today().year
+        if amount <= 0:
+            amount = None
+    if amount is not None:
+        return amount / 12 if "month" in answer_lower else amount
+    return _keyword_score(answer_lower, {"short": 2.0, "medium": 7.0, "long": 15.0})
+
+def profile_features(profile: Dict[str, Dict[str, Any]]) -> np.ndarray:
+    """
+    Turn an investment profile into a row of risk features.
+    Unknown or unanswered features are NaN and ignored when scoring.
+    """
+    def answer(category: str, field: str) -> Any:
+        value = profile.get(category, {}).get(field)
+        return None if value == SKIPPED_ANSWER else value
+    
+    reaction_keywords = {"panic": 0.0, "sell": 0.0, "worr": 0.25, "nervous": 0.25, "hold": 0.6, "wait": 0.6, "calm": 0.6, "buy": 1.0}
+    # Not panicking or selling reads as holding on
+    reaction_negated = {"panic": 0.6, "sell": 0.6, "worr": 0.6, "nervous": 0.6, "buy": 0.5}
+    
+    age = _amount(answer("personal_info", "age"))
+    income = _amount(answer("current_financial_status", "monthly_income"))
+    expenses = _amount(answer("current_financial_status", "monthly_expenses"))
+    acceptable_loss = _amount(answer("risk_profile", "acceptable_loss"))
+    horizon = _horizon_years(answer("investment_preferences", "investment_duration"))
+    experience = _keyword_score(answer("investment_experience", "experience"), {
+        "none": 0.0, "beginner": 0.25, "intermediate": 0.5, "advanced": 0.75, "expert": 1.0
+    })
+    if experience is None:
+        # Plain yes/no answers such as "Yes, in ETFs" count as some experience
+        has_experience = _yes_no_score(answer("investment_experience", "experience"))
+        experience = None if has_experience is None else has_experience * 0.5
+    
+    values = [
+        # Younger clients have more time to recover from losses
+        None if age is None else (70 - age) / 50,
+        experience,
+        None if not income or expenses is None else (income - expenses) / income * 2,
+        _yes_no_score(answer("financial_security", "emergency_fund")),
+        _yes_no_score(answer("short_term_goals", "goals"), yes=0.0),
+        _keyword_score(answer("risk_profile", "profit_vs_preservation"), {
+            "both": 0.5, "balance": 0.5, "preserv": 0.0, "capital": 0.0, "profit": 1.0, "growth": 1.0
+        }),
+        _keyword_score(answer("risk_profile", "risk_tolerance"), {
+            "conservative": 0.0, "low": 0.0, "moderate": 0.5, "medium": 0.5, "aggressive": 1.0, "high": 1.0
+        }, negated={"conservative": 0.75, "aggressive": 0.5}),
+        _keyword_score(answer("risk_profile", "decline_reaction"), reaction_keywords, reaction_negated),
+        None if acceptable_loss is None else acceptable_loss / 40,
+        _keyword_score(answer("risk_profile", "market_drop_reaction"), reaction_keywords, reaction_negated),
+        None if horizon is None else horizon / 20,
+        _yes_no_score(answer("investment_preferences", "future_expenses"), yes=0.0),
+        _keyword_score(answer("investment_preferences", "liquidity_importance"), {
+            "low": 1.0, "somewhat": 0.5, "moderate": 0.5, "very": 0.0, "high": 0.0, "important": 0.0
+        }, negated={"very": 1.0, "important": 1.0}),
+        _yes_no_score(answer("investment_preferences", "illiquid_assets"))
+    ]
+    
+    return np.clip(np.array([np.nan if value is None else value for value in values], dtype=float), 0.0, 1.0)
+
+def score_profiles(features: np.ndarray) -> np.ndarray:
+    """
+    Compute risk scores (0-100) for a batch of feature rows as the weighted
+    mean of the known features. Rows without any known feature score 50.
+    """
+    known = ~np.isnan(features)
+    weights = np.where(known, FEATURE_WEIGHTS, 0.0)
+    weight_sums = weights.sum(axis=1)
+    weighted = np.where(known, features, 0.0) * weights
+    scores = np.divide(weighted.sum(axis=1), weight_sums, out=np.full(len(features), 0.5), where=weight_sums > 0)
+    return scores * 100
+
+def allocate(scores: np.ndarray, features: np.ndarray) -> np.ndarray:
+    """
+    Compute whole-percent target allocations over ASSET_CLASSES for a batch
+    of risk scores, adjusted for emergency fund and liquidity constraints.
+    """
+    allocations = CONSERVATIVE_PORTFOLIO + (scores / 100)[:, None] * (AGGRESSIVE_PORTFOLIO - CONSERVATIVE_PORTFOLIO)
+    
+    # Scale real estate down for clients who do not want illiquid assets
+    illiquid = features[:, FEATURES.index("illiquid_assets")]
+    allocations[:, ASSET_CLASSES.index("real_estate")] *= np.where(np.isnan(illiquid), 1.0, illiquid)
+    
+    # Normalize to 100%
+    allocations = allocations / allocations.sum(axis=1, keepdims=True) * 100
+    
+    # Keep a cash buffer for clients without an emergency fund, scaling the other assets down
+    cash = ASSET_CLASSES.index("cash")
+    no_emergency_fund = features[:, FEATURES.index("emergency_fund")] == 0.0
+    target_cash = np.where(
+        no_emergency_fund,
+        np.maximum(allocations[:, cash], EMERGENCY_CASH_FLOOR),
+        allocations[:, cash]
+    )
+    allocations *= ((100 - target_cash) / (100 - allocations[:, cash]))[:, None]
+    allocations[:, cash] = target_cash
+    
+    # Round with the largest remainder method
+    floors = np.floor(allocations)
+    remainders = (100 - floors.sum(axis=1)).astype(int)
+    ranks = np.argsort(np.argsort(floors - allocations, axis=1), axis=1)
+    return floors + (ranks < remainders[:, None])
+
+def get_risk_level(score: float) -> str:
+    if score < 35:
+        return "conservative"
+    if score < 65:
+        return "moderate"
+    return "aggressive"
+
+def compute_allocations(profiles: List[Dict[str, Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """Score a batch of investment profiles and compute their target allocations."""
+    if not profiles:
+        return []
+    
+    features = np.vstack([profile_features(profile) for profile in profiles])
+    scores = score_profiles(features)
+    allocations = allocate(scores, features)
+    
+    return [
+        {
+            "risk_score": round(float(score), 1),
+            "risk_level": get_risk_level(score),
+            "allocation": {asset: int(percent) for asset, percent in zip(ASSET_CLASSES, row)}
+        }
+        for score, row in zip(scores, allocations)
+    ]
+
+def compute_allocation(profile: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """Score a single investment profile and compute its target allocation."""
+    return compute_allocations([profile])[0]
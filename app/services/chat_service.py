@@ -1,50 +1,139 @@
+import json
 import uuid
-from langchain_community.llms import OpenAI
+from concurrent.futures import Future, ThreadPoolExecutor
 from langchain.prompts import PromptTemplate
 from langchain.chains import LLMChain
 from app.models import ChatMessage, MessageHistory
-from app.config import openai_api_key, active_threads, INVESTMENT_QUESTIONS
-from app.services.strategy_service import generate_investment_strategy
-from typing import Optional, Dict, Any
+from app.config import (
+    active_threads,
+    INVESTMENT_QUESTIONS,
+    STRATEGY_INPUT_CATEGORIES,
+    SPECULATIVE_STRATEGY,
+    STRATEGY_WORKERS,
+    SPECULATIVE_STRATEGY_WORKERS,
+    SKIPPED_ANSWER
+)
+from app.services.llm_service import get_llm, TokenCallbackHandler
+from app.services.extraction_service import extract_profile_fields
+from app.services.questionnaire_service import get_question_field, is_question_applicable
+from app.services.strategy_service import (
+    generate_investment_strategy,
+    generate_strategy_draft,
+    complete_strategy_draft
+)
+from typing import Optional, Dict, Any, Callable
+
+# Runs strategy generation alongside the chat LLM call on final turns
+strategy_executor = ThreadPoolExecutor(max_workers=STRATEGY_WORKERS, thread_name_prefix="strategy")
+# Runs speculative strategy drafts, separately so they cannot delay final turns
+draft_executor = ThreadPoolExecutor(max_workers=SPECULATIVE_STRATEGY_WORKERS, thread_name_prefix="strategy-draft")
 
 def get_next_question(thread: MessageHistory) -> tuple[Optional[str], Optional[str]]:
-    """Get the next question and category to ask."""
+    """
+    Get the next question and category to ask.
+    Questions that were already answered are passed over; questions whose
+    conditions rule them out are skipped and their profile fields are marked
+    with SKIPPED_ANSWER.
+    """
+    questions = [
+        (category, question)
+        for category, category_questions in INVESTMENT_QUESTIONS.items()
+        for question in category_questions
+    ]
+    
     if not thread.current_category:
         # Start with the first category
-        next_category = list(INVESTMENT_QUESTIONS.keys())[0]
-        return next_category, INVESTMENT_QUESTIONS[next_category][0]
+        start_index = 0
+    else:
+        try:
+            # Continue after the current question
+            start_index = questions.index((thread.current_category, thread.current_question)) + 1
+        except ValueError:
+            # Question not found in current category
+            return None, None
     
-    current_category = thread.current_category
-    current_question = thread.current_question
+    for category, question in questions[start_index:]:
+        # Already answered as part of an earlier response
+        if thread.investment_profile[category][get_question_field(category, question)] is not None:
+            continue
+        if is_question_applicable(thread, category, question):
+            return category, question
+        thread.investment_profile[category][get_question_field(category, question)] = SKIPPED_ANSWER
     
-    # Find current question index in current category
-    current_questions = INVESTMENT_QUESTIONS[current_category]
+    # No more questions
+    return None, None
+
+def get_strategy_inputs(thread: MessageHistory) -> str:
+    """Serialize the profile categories that drive the strategy's allocation."""
+    return json.dumps(
+        {category: thread.investment_profile[category] for category in STRATEGY_INPUT_CATEGORIES},
+        sort_keys=True
+    )
+
+def strategy_inputs_answered(thread: MessageHistory) -> bool:
+    """Check whether the questionnaire has moved past every strategy input category."""
+    if not thread.current_category:
+        return True
+    
+    categories = list(INVESTMENT_QUESTIONS.keys())
+    current_index = categories.index(thread.current_category)
+    return all(
+        category in categories and categories.index(category) < current_index
+        for category in STRATEGY_INPUT_CATEGORIES
+    )
+
+def is_draft_usable(thread: MessageHistory) -> bool:
+    """Check that the speculative draft has not failed and its inputs are unchanged."""
+    draft = thread.strategy_draft
+    return (
+        draft is not None
+        and thread.strategy_inputs == get_strategy_inputs(thread)
+        and not (draft.done() and (draft.cancelled() or draft.exception() is not None))
+    )
+
+def start_strategy_draft(thread: MessageHistory) -> None:
+    """
+    Start the speculative draft of the allocation sections on draft_executor,
+    unless a usable one is already running or finished.
+    """
+    if is_draft_usable(thread):
+        return
+    
+    if thread.strategy_draft is not None:
+        thread.strategy_draft.cancel()
+    thread.strategy_inputs = get_strategy_inputs(thread)
+    thread.strategy_draft = draft_executor.submit(generate_strategy_draft, thread)
+
+def finish_strategy(thread: MessageHistory, draft: Future) -> str:
+    """Complete the speculative draft, or generate the full strategy if the draft failed."""
     try:
-        question_index = current_questions.index(current_question)
-        
-        # If there are more questions in current category
-        if question_index < len(current_questions) - 1:
-            return current_category, current_questions[question_index + 1]
-        
-        # Move to next category
-        categories = list(INVESTMENT_QUESTIONS.keys())
-        current_category_index = categories.index(current_category)
-        
-        # If there are more categories
-        if current_category_index < len(categories) - 1:
-            next_category = categories[current_category_index + 1]
-            return next_category, INVESTMENT_QUESTIONS[next_category][0]
-        
-        # No more questions
-        return None, None
-        
-    except ValueError:
-        # Question not found in current category
-        return None, None
+        draft_text = draft.result()
+    except Exception:
+        return generate_investment_strategy(thread)
+    return complete_strategy_draft(thread, draft_text)
+
+def start_strategy_generation(thread: MessageHistory) -> Future:
+    """
+    Return a future for the thread's full investment strategy on strategy_executor.
+    A usable speculative draft is completed with the sections that use the whole
+    profile; otherwise the strategy is generated from scratch.
+    """
+    draft = thread.strategy_draft
+    usable = is_draft_usable(thread)
+    
+    # A draft still waiting for a worker must not hold up the final turn
+    if usable and draft.cancel():
+        usable = False
+    
+    if usable:
+        return strategy_executor.submit(finish_strategy, thread, draft)
+    return strategy_executor.submit(generate_investment_strategy, thread)
 
 def update_investment_profile(thread: MessageHistory, response: str) -> tuple[bool, Optional[str]]:
     """
     Update the investment profile based on the current question and response.
+    Other unanswered fields covered by the response are filled as well, so
+    get_next_question skips their questions.
     Returns (success, error_message).
     """
     if not thread.current_category or not thread.current_question:
@@ -53,137 +142,24 @@ def update_investment_profile(thread: MessageHistory, response: str) -> tuple[bo
     category = thread.current_category
     question = thread.current_question
     
-    profile = thread.investment_profile[category]
+    field = get_question_field(category, question)
+    if not field:
+        return False, "Unknown question."
     
-    # Map questions to profile fields based on category
-    if category == "personal_info":
-        if "gender" in question.lower():
-            profile["gender"] = response
-        elif "age" in question.lower():
-            profile["age"] = response
-        elif "marital status" in question.lower():
-            profile["marital_status"] = response
-        elif "changes" in question.lower():
-            profile["expected_changes"] = response
-        elif "country" in question.lower():
-            profile["country"] = response
+    # The current question always keeps the full response; it is stored first
+    # so extraction only fills the other open fields
+    thread.investment_profile[category][field] = response
     
-    elif category == "investment_experience":
-        if "experience" in question.lower():
-            profile["experience"] = response
-        elif "real estate" in question.lower():
-            profile["alternative_investments"] = response
-    
-    elif category == "current_financial_status":
-        if "monthly income" in question.lower():
-            profile["monthly_income"] = response
-        elif "monthly expenses" in question.lower():
-            profile["monthly_expenses"] = response
-        elif "save each month" in question.lower():
-            profile["monthly_savings"] = response
-        elif "liabilities" in question.lower():
-            profile["financial_liabilities"] = response
-        elif "invest immediately" in question.lower():
-            profile["immediate_investment"] = response
-        elif "allocate monthly" in question.lower():
-            profile["monthly_investment"] = response
-            
-    elif category == "financial_security":
-        if "emergency fund" in question.lower():
-            profile["emergency_fund"] = response
-        elif "living expenses" in question.lower():
-            profile["months_coverage"] = response
-            
-    elif category == "current_investments":
-        if "where" in question.lower():
-            profile["existing_investments"] = response
-        elif "percentage" in question.lower():
-            profile["invested_percentage"] = response
-            
-    elif category == "short_term_goals":
-        if "achieve within" in question.lower():
-            profile["goals"] = response
-        elif "amount needed" in question.lower():
-            profile["amounts_needed"] = response
-        elif "flexible" in question.lower():
-            profile["timeline_flexibility"] = response
-            
-    elif category == "mid_term_goals":
-        if "plan to achieve" in question.lower():
-            profile["goals"] = response
-        elif "amount needed" in question.lower():
-            profile["amounts_needed"] = response
-        elif "timing" in question.lower():
-            profile["timing_importance"] = response
-            
-    elif category == "goal_prioritization":
-        if "main financial goals" in question.lower():
-            profile["main_goals"] = response
-        elif "rank" in question.lower():
-            profile["priority_ranking"] = response
-        elif "mandatory" in question.lower():
-            profile["mandatory_goals"] = response
-            
-    elif category == "risk_profile":
-        if "maximizing profit" in question.lower():
-            profile["profit_vs_preservation"] = response
-        elif "risk tolerance" in question.lower():
-            profile["risk_tolerance"] = response
-        elif "react to temporary" in question.lower():
-            profile["decline_reaction"] = response
-        elif "acceptable" in question.lower():
-            profile["acceptable_loss"] = response
-        elif "20% drop" in question.lower():
-            profile["market_drop_reaction"] = response
-            
-    elif category == "investment_preferences":
-        if "how long" in question.lower():
-            profile["investment_duration"] = response
-        elif "major expenses" in question.lower():
-            profile["future_expenses"] = response
-        elif "quickly access" in question.lower():
-            profile["liquidity_importance"] = response
-        elif "less liquid" in question.lower():
-            profile["illiquid_assets"] = response
-            
-    elif category == "restrictions":
-        if "ethical reasons" in question.lower():
-            profile["ethical_restrictions"] = response
-        elif "interest or disinterest" in question.lower():
-            profile["preferred_industries"] = response
-        elif "legal or tax restrictions" in question.lower():
-            profile["legal_restrictions"] = response
-        elif "personal preferences" in question.lower():
-            profile["personal_preferences"] = response
-            
-    elif category == "investment_instruments":
-        if "international capital markets" in question.lower():
-            profile["international_access"] = response
-        elif "instruments are available" in question.lower():
-            profile["available_instruments"] = response
-        elif "particular industries" in question.lower():
-            profile["preferred_industries"] = response
-        elif "geographic regions" in question.lower():
-            profile["geographic_focus"] = response
-        elif "tax-efficient" in question.lower():
-            profile["tax_efficiency"] = response
-            
-    elif category == "success_metrics":
-        if "define the success" in question.lower():
-            profile["success_definition"] = response
-        elif "return metrics" in question.lower():
-            profile["return_expectations"] = response
-        elif "review and adjust" in question.lower():
-            profile["review_frequency"] = response
-        elif "life events" in question.lower():
-            profile["life_events"] = response
-        elif "actively" in question.lower():
-            profile["management_style"] = response
-    
-    thread.investment_profile[category] = profile
+    extracted = extract_profile_fields(thread, response, category)
+    for (extracted_category, extracted_field), value in extracted.items():
+        thread.investment_profile[extracted_category][extracted_field] = value
     return True, None
 
-def process_chat(chat_message: ChatMessage) -> Dict[str, Any]:
+def process_chat(chat_message: ChatMessage, on_token: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
+    """
+    Process one user message and return the assistant's reply.
+    If on_token is given, the reply's LLM tokens are passed to it as they are generated.
+    """
     # Create or get thread
     if not chat_message.thread_id or chat_message.thread_id not in active_threads:
         thread_id = str(uuid.uuid4())
@@ -245,8 +221,8 @@ User: {message}
 Assistant:"""
     )
     
-    # Initialize OpenAI LLM
-    llm = OpenAI(temperature=0.7, openai_api_key=openai_api_key)
+    # Initialize the LLM
+    llm = get_llm(temperature=0.7, streaming=on_token is not None)
     
     # Format conversation history
     history = "\n".join([
@@ -264,13 +240,26 @@ Assistant:"""
     # Create a chain with the LLM and prompt
     chain = LLMChain(llm=llm, prompt=chat_prompt)
     
+    # Check if profile is complete
+    if not next_category and not next_question:
+        thread.profile_complete = True
+    
+    # The strategy prompt does not depend on this turn's reply, so generate it
+    # concurrently with the chat response instead of after it
+    strategy_future = None
+    if thread.profile_complete and not thread.strategy_generated:
+        strategy_future = start_strategy_generation(thread)
+    elif SPECULATIVE_STRATEGY and strategy_inputs_answered(thread):
+        start_strategy_draft(thread)
+    
     # Get response from AI
     response = chain.run(
         message=chat_message.message,
         history=history,
         current_category=thread.current_category,
         current_question=thread.current_question,
-        investment_profile=profile_str
+        investment_profile=profile_str,
+        callbacks=[TokenCallbackHandler(on_token)] if on_token else None
     )
     
     # Store the conversation
@@ -279,13 +268,10 @@ Assistant:"""
         "assistant": response
     })
     
-    # Check if profile is complete
-    if not next_category and not next_question:
-        thread.profile_complete = True
-    
-    # Generate investment strategy if profile is complete and strategy hasn't been generated yet
-    if thread.profile_complete and not thread.strategy_generated:
-        strategy = generate_investment_strategy(thread)
+    # Collect the investment strategy started above
+    if strategy_future is not None:
+        strategy = strategy_future.result()
+        thread.strategy = strategy
         thread.strategy_generated = True
         return {
             "response": f"{response}\n\n{strategy}",
@@ -305,7 +291,8 @@ Assistant:"""
         "thread_id": thread_id,
         "current_category": thread.current_category,
         "current_question": thread.current_question,
-        "profile_complete": thread.profile_complete
+        "profile_complete": thread.profile_complete,
+        "strategy": thread.strategy
     }
 
 def get_thread_history(thread_id: str):
@@ -318,5 +305,6 @@ def get_thread_history(thread_id: str):
         "investment_profile": thread.investment_profile,
         "current_category": thread.current_category,
         "current_question": thread.current_question,
-        "profile_complete": thread.profile_complete
+        "profile_complete": thread.profile_complete,
+        "strategy": thread.strategy
     } 
\ No newline at end of file
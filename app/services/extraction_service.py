@@ -0,0 +1,171 @@
+import json
+import logging
+import re
+from typing import Dict, List, Optional, Tuple
+from langchain.prompts import PromptTemplate
+from langchain.chains import LLMChain
+from app.models import MessageHistory
+from app.config import INVESTMENT_QUESTIONS, QUESTION_FIELDS
+from app.services.llm_service import get_llm
+from app.services.validation_service import validate_response
+
+logger = logging.getLogger(__name__)
+
+# Responses this short are treated as a direct answer to the current question
+EXTRACTION_MIN_WORDS = 6
+
+# Local extraction rules: (category, field, pattern, answered_categories); the value
+# is the first capture group, or the whole match if the pattern has no groups.
+# Rules with answered_categories only apply to answers to questions in those categories;
+# numbers and style words are too ambiguous to read from unrelated answers.
+# Money amounts need a currency, a "k" suffix or a per-month phrase, so counts
+# ("10 trades a month") and percentages ("8% a year") are not read as money
+AMOUNT = (
+    r"([$€£]\s?\d[\d.,]*\s?k?\b"
+    r"|\d[\d.,]*\s?k\b"
+    r"|\d[\d.,]*\s?(?:eur|euros?|usd|dollars?|gbp|pounds?|uah)\b"
+    r"|\d[\d.,]*(?=\s*(?:a|per|each|every)\s+month\b|\s*/\s*mo|\s+monthly\b))"
+)
+EXTRACTION_RULES: List[Tuple[str, str, re.Pattern, Optional[List[str]]]] = [
+    ("personal_info", "gender", re.compile(r"\b(male|female|man|woman)\b", re.IGNORECASE), None),
+    ("personal_info", "age", re.compile(r"\b(?:i'?m|i am|aged?)\s+(\d{2})\b|\b(\d{2})\s*(?:years? old|y/?o)\b", re.IGNORECASE), None),
+    ("personal_info", "marital_status", re.compile(
+        r"\b(?:single|married|divorced|widowed|separated)\b(?:\s+with\s+(?:no|\w+)\s+(?:kids|children|child|dependents))?",
+        re.IGNORECASE
+    ), None),
+    ("personal_info", "country", re.compile(r"\b(?:live|living|based|reside|residing) in ([A-Z][\w-]*(?: [A-Z][\w-]*)*)"), None),
+    ("current_financial_status", "monthly_income", re.compile(r"\b(?:earn|earning|make|making)\s+(?:about\s+|around\s+)?" + AMOUNT, re.IGNORECASE), ["current_financial_status"]),
+    ("current_financial_status", "monthly_expenses", re.compile(r"\b(?:spend|spending)\s+(?:about\s+|around\s+)?" + AMOUNT, re.IGNORECASE), ["current_financial_status"]),
+    ("current_financial_status", "monthly_savings", re.compile(r"\b(?:save|saving)\s+(?:about\s+|around\s+)?" + AMOUNT, re.IGNORECASE), ["current_financial_status"]),
+    # These words also describe experience or goals, so only read them from risk answers
+    ("risk_profile", "risk_tolerance", re.compile(r"\b(conservative|moderate|aggressive)\b", re.IGNORECASE), ["risk_profile"])
+]
+
+# Words that suggest an answer also covers other categories: (categories, pattern).
+# The LLM is only called when one of them points at a category with open fields
+# other than the one being answered, so plain lists ("Stocks, ETFs and crypto") stay local.
+EXTRACTION_HINTS: List[Tuple[List[str], re.Pattern]] = [
+    (["personal_info"], re.compile(
+        r"\b(?:years? old|married|single|divorced|kids|children|wife|husband|partner|live in|living in|citizen|resident)\b",
+        re.IGNORECASE
+    )),
+    (["current_financial_status"], re.compile(
+        r"\b(?:earn\w*|income|salary|spend\w*|expenses|sav(?:e|ing)|debts?|loans?|mortgage)\b", re.IGNORECASE
+    )),
+    (["financial_security"], re.compile(r"\bemergency\b", re.IGNORECASE)),
+    (["short_term_goals", "mid_term_goals", "goal_prioritization"], re.compile(
+        r"\b(?:goals?|retire\w*|house|car|education|wedding)\b", re.IGNORECASE
+    )),
+    (["risk_profile"], re.compile(r"\b(?:risk\w*|conservative|aggressive|loss|losses|volatil\w*)\b", re.IGNORECASE)),
+    (["investment_preferences"], re.compile(r"\b(?:liquid\w*|withdraw\w*|horizon)\b", re.IGNORECASE))
+]
+
+def get_open_questions(thread: MessageHistory) -> Dict[Tuple[str, str], str]:
+    """Get the question for every profile field that has not been answered yet."""
+    open_questions = {}
+    for category, questions in INVESTMENT_QUESTIONS.items():
+        for question, field in zip(questions, QUESTION_FIELDS[category]):
+            if thread.investment_profile[category][field] is None:
+                open_questions[(category, field)] = question
+    return open_questions
+
+def extract_fields_locally(response: str, answered_category: Optional[str] = None) -> Dict[Tuple[str, str], str]:
+    """
+    Rule-based pre-pass that picks common facts out of a free-text answer
+    to a question in answered_category.
+    """
+    extracted = {}
+    for category, field, pattern, answered_categories in EXTRACTION_RULES:
+        if answered_categories is not None and answered_category not in answered_categories:
+            continue
+        match = pattern.search(response)
+        if match:
+            groups = [group for group in match.groups() if group]
+            extracted[(category, field)] = (groups[0] if groups else match.group(0)).strip()
+    return extracted
+
+def extract_fields_with_llm(response: str, open_questions: Dict[Tuple[str, str], str]) -> Dict[Tuple[str, str], str]:
+    """Extract answers to the open questions with a single schema-constrained LLM call."""
+    extraction_prompt = PromptTemplate(
+        input_variables=["fields", "message"],
+        template="""You extract facts from a client's message for an investment questionnaire.
+
+Profile fields, as "key: question":
+{fields}
+
+Return only a JSON object. Use keys from the list above and string values quoted from or
+closely paraphrasing the message. Include a key only if the message explicitly answers its
+question. Return {{}} if nothing is answered.
+
+Message: {message}
+JSON:"""
+    )
+    
+    # Initialize the LLM
+    llm = get_llm(temperature=0)
+    
+    fields = "\n".join(
+        f"{category}.{field}: {question}"
+        for (category, field), question in open_questions.items()
+    )
+    
+    # Create a chain with the LLM and prompt
+    chain = LLMChain(llm=llm, prompt=extraction_prompt)
+    try:
+        output = chain.run(fields=fields, message=response)
+    except Exception:
+        # Extraction is best effort: the answer to the current question is already stored
+        logger.exception("Profile field extraction failed")
+        return {}
+    
+    # Keep only string answers for the fields that were asked for
+    match = re.search(r"\{.*\}", output, re.DOTALL)
+    if not match:
+        return {}
+    try:
+        data = json.loads(match.group(0))
+    except json.JSONDecodeError:
+        return {}
+    if not isinstance(data, dict):
+        return {}
+    
+    extracted = {}
+    for key, value in data.items():
+        category, _, field = str(key).partition(".")
+        if (category, field) in open_questions and isinstance(value, str) and value.strip():
+            extracted[(category, field)] = value.strip()
+    return extracted
+
+def extract_profile_fields(thread: MessageHistory, response: str, answered_category: Optional[str] = None) -> Dict[Tuple[str, str], str]:
+    """
+    Map a free-text answer to every unanswered profile field it covers.
+    The local pre-pass runs first; the LLM is only called for longer answers
+    that contain more statements than the pre-pass could account for and
+    mention another category with open fields.
+    Returns validated values keyed by (category, field).
+    """
+    open_questions = get_open_questions(thread)
+    
+    extracted = {
+        key: value for key, value in extract_fields_locally(response, answered_category).items()
+        if key in open_questions
+    }
+    
+    words = response.split()
+    clauses = [clause for clause in re.split(r"[,;.]|\band\b", response) if clause.strip()]
+    remaining = {key: question for key, question in open_questions.items() if key not in extracted}
+    remaining_categories = {category for category, _ in remaining} - {answered_category}
+    hinted = any(
+        remaining_categories.intersection(categories) and pattern.search(response)
+        for categories, pattern in EXTRACTION_HINTS
+    )
+    # One clause is taken to answer the current question itself
+    if hinted and len(words) > EXTRACTION_MIN_WORDS and len(extracted) + 1 < len(clauses):
+        extracted.update(extract_fields_with_llm(response, remaining))
+    
+    # Keep only values that pass the same validation as a direct answer
+    return {
+        (category, field): value
+        for (category, field), value in extracted.items()
+        if validate_response(category, open_questions[(category, field)], value)[0]
+    }
@@ -0,0 +1,29 @@
+from typing import Callable
+from langchain.callbacks.base import BaseCallbackHandler
+from langchain_community.llms import OpenAI
+from langchain_community.llms.fake import FakeListLLM
+from app.config import openai_api_key, LLM_PROVIDER
+
+# Canned reply of the fake LLM used for local testing
+FAKE_LLM_RESPONSE = "This is a placeholder response from the fake LLM used for local testing."
+
+class TokenCallbackHandler(BaseCallbackHandler):
+    """Forwards each streamed LLM token to a callback."""
+    
+    def __init__(self, on_token: Callable[[str], None]):
+        self.on_token = on_token
+    
+    def on_llm_new_token(self, token: str, **kwargs) -> None:
+        self.on_token(token)
+
+def get_llm(temperature: float, streaming: bool = False):
+    """
+    Create the LLM configured by LLM_PROVIDER ("openai" or "fake").
+    With streaming, tokens are reported to callbacks as they are generated;
+    the fake LLM only returns its full response.
+    """
+    if LLM_PROVIDER == "fake":
+        return FakeListLLM(responses=[FAKE_LLM_RESPONSE])
+    
+    # Initialize OpenAI LLM
+    return OpenAI(temperature=temperature, openai_api_key=openai_api_key, streaming=streaming)
@@ -0,0 +1,31 @@
+from typing import Optional
+from app.models import MessageHistory
+from app.config import INVESTMENT_QUESTIONS, QUESTION_FIELDS, QUESTION_CONDITIONS, SKIPPED_ANSWER
+from app.utils import parse_yes_no
+
+def get_question_field(category: str, question: str) -> Optional[str]:
+    """Get the profile field filled by a question, or None if the question is unknown."""
+    try:
+        question_index = INVESTMENT_QUESTIONS[category].index(question)
+    except (KeyError, ValueError):
+        return None
+    return QUESTION_FIELDS[category][question_index]
+
+def is_question_applicable(thread: MessageHistory, category: str, question: str) -> bool:
+    """
+    Evaluate the question's condition from QUESTION_CONDITIONS against earlier answers.
+    Questions without a condition, or whose condition depends on an unanswered
+    or ambiguous field, are always asked. Follow-ups of skipped questions are skipped.
+    """
+    field = get_question_field(category, question)
+    rule = QUESTION_CONDITIONS.get(category, {}).get(field)
+    if not rule:
+        return True
+    
+    answer = thread.investment_profile[rule["category"]].get(rule["field"])
+    if answer == SKIPPED_ANSWER:
+        return False
+    if not isinstance(answer, str):
+        return True
+    
+    return parse_yes_no(answer) != rule["skip_if"]
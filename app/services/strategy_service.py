@@ -1,19 +1,46 @@
-from langchain_community.llms import OpenAI
 from langchain.prompts import PromptTemplate
 from langchain.chains import LLMChain
+from typing import Any, Dict, List, Optional
 from app.models import MessageHistory
-from app.config import openai_api_key
+from app.config import STRATEGY_INPUT_CATEGORIES
+from app.services.llm_service import get_llm
+from app.services.allocation_service import compute_allocation
+
+def format_investment_profile(investment_profile: Dict[str, Dict[str, Any]], categories: Optional[List[str]] = None) -> str:
+    """Format the investment profile, or only the given categories, for a prompt."""
+    profile_sections = []
+    for category, profile in investment_profile.items():
+        if categories is not None and category not in categories:
+            continue
+        section = f"\n{category.replace('_', ' ').title()}:\n"
+        for key, value in profile.items():
+            formatted_key = key.replace('_', ' ').title()
+            section += f"  {formatted_key}: {value if value is not None else 'Not provided'}\n"
+        profile_sections.append(section)
+    
+    return "\n".join(profile_sections)
+
+def format_target_allocation(investment_profile: Dict[str, Dict[str, Any]]) -> str:
+    """Compute the allocation locally and format it so the model only explains it."""
+    allocation = compute_allocation(investment_profile)
+    return f"  Risk Score: {allocation['risk_score']}/100 ({allocation['risk_level'].title()})\n" + "\n".join(
+        f"  {asset.replace('_', ' ').title()}: {percent}%"
+        for asset, percent in allocation["allocation"].items()
+    )
 
 def generate_investment_strategy(thread: MessageHistory):
     # Define the strategy generation prompt template
     strategy_prompt = PromptTemplate(
-        input_variables=["investment_profile"],
+        input_variables=["investment_profile", "target_allocation"],
         template="""You are an experienced investment advisor AI assistant.
         Based on the user's comprehensive investment profile, create a detailed investment strategy.
         
         User's investment profile:
         {investment_profile}
         
+        Target asset allocation computed from the profile:
+        {target_allocation}
+        
         Please provide a comprehensive investment strategy that includes:
         
         1. Executive Summary
@@ -22,8 +49,8 @@ def generate_investment_strategy(thread: MessageHistory):
         - Overall risk tolerance assessment
         
         2. Asset Allocation Strategy
-        - Recommended portfolio allocation across different asset classes
-        - Specific allocation percentages based on risk profile
+        - Explain the target asset allocation above; use exactly these percentages and do not propose different ones
+        - How the allocation reflects the risk score and the client's goals
         - Geographic diversification strategy
         
         3. Investment Vehicle Recommendations
@@ -56,24 +83,124 @@ def generate_investment_strategy(thread: MessageHistory):
         Investment Strategy:"""
     )
     
-    # Initialize OpenAI LLM
-    llm = OpenAI(temperature=0.7, openai_api_key=openai_api_key)
+    # Initialize the LLM
+    llm = get_llm(temperature=0.7)
     
     # Format investment profile with detailed categorization
-    profile_sections = []
-    for category, profile in thread.investment_profile.items():
-        section = f"\n{category.replace('_', ' ').title()}:\n"
-        for key, value in profile.items():
-            formatted_key = key.replace('_', ' ').title()
-            section += f"  {formatted_key}: {value if value is not None else 'Not provided'}\n"
-        profile_sections.append(section)
+    profile_str = format_investment_profile(thread.investment_profile)
     
-    profile_str = "\n".join(profile_sections)
+    # Compute the allocation locally so the model only explains it
+    allocation_str = format_target_allocation(thread.investment_profile)
     
     # Create a chain with the LLM and prompt
     chain = LLMChain(llm=llm, prompt=strategy_prompt)
     
     # Get strategy from AI
-    strategy = chain.run(investment_profile=profile_str)
+    strategy = chain.run(investment_profile=profile_str, target_allocation=allocation_str)
+    
+    return strategy
+
+def generate_strategy_draft(thread: MessageHistory) -> str:
+    """
+    Write the strategy sections that depend only on STRATEGY_INPUT_CATEGORIES.
+    Used as a speculative draft before the questionnaire ends; the prompt sees
+    no other answers, so the draft stays valid while those categories are unchanged.
+    """
+    # Define the draft prompt template
+    draft_prompt = PromptTemplate(
+        input_variables=["investment_profile", "target_allocation"],
+        template="""You are an experienced investment advisor AI assistant.
+        Based on the user's investment profile, write the first sections of an investment strategy.
+        
+        User's investment profile:
+        {investment_profile}
+        
+        Target asset allocation computed from the profile:
+        {target_allocation}
+        
+        Please provide only these sections:
+        
+        1. Executive Summary
+        - Brief overview of the client's profile
+        - Key financial goals and priorities
+        - Overall risk tolerance assessment
+        
+        2. Asset Allocation Strategy
+        - Explain the target asset allocation above; use exactly these percentages and do not propose different ones
+        - How the allocation reflects the risk score and the client's goals
+        
+        3. Risk Management Strategy
+        - Diversification approach
+        - Emergency fund recommendations
+        
+        Investment Strategy:"""
+    )
+    
+    # Initialize the LLM
+    llm = get_llm(temperature=0.7)
+    
+    profile_str = format_investment_profile(thread.investment_profile, STRATEGY_INPUT_CATEGORIES)
+    allocation_str = format_target_allocation(thread.investment_profile)
+    
+    # Create a chain with the LLM and prompt
+    chain = LLMChain(llm=llm, prompt=draft_prompt)
+    return chain.run(investment_profile=profile_str, target_allocation=allocation_str)
+
+def complete_strategy_draft(thread: MessageHistory, draft: str) -> str:
+    """
+    Finish a draft from generate_strategy_draft with the sections that use the
+    whole profile, including the restrictions, investment_instruments and
+    success_metrics answers given after the draft was started.
+    """
+    # Define the completion prompt template
+    completion_prompt = PromptTemplate(
+        input_variables=["investment_profile", "target_allocation", "draft"],
+        template="""You are an experienced investment advisor AI assistant.
+        Complete the investment strategy below using the user's full investment profile.
+        
+        User's investment profile:
+        {investment_profile}
+        
+        Target asset allocation computed from the profile:
+        {target_allocation}
+        
+        Strategy so far:
+        {draft}
+        
+        Please continue with only these sections, consistent with the strategy so far:
+        
+        4. Investment Vehicle Recommendations
+        - Specific investment products and vehicles available to the client
+        - Tax-efficient investment options
+        - Respect the client's ethical, legal and tax restrictions and ESG preferences
+        - Geographic diversification strategy
+        
+        5. Implementation Timeline
+        - Phased investment approach
+        - Rebalancing schedule
+        - Major milestones and checkpoints
+        
+        6. Monitoring and Review Plan
+        - Performance metrics and benchmarks matching the client's definition of success
+        - Review frequency and triggers
+        - Adjustment criteria
+        
+        7. Additional Considerations
+        - Tax optimization strategies
+        - Estate planning considerations
+        - Insurance recommendations if applicable
+        
+        Continuation:"""
+    )
+    
+    # Initialize the LLM
+    llm = get_llm(temperature=0.7)
+    
+    profile_str = format_investment_profile(thread.investment_profile)
+    allocation_str = format_target_allocation(thread.investment_profile)
+    
+    # Create a chain with the LLM and prompt
+    chain = LLMChain(llm=llm, prompt=completion_prompt)
+    completion = chain.run(investment_profile=profile_str, target_allocation=allocation_str, draft=draft)
     
-    return strategy 
\ No newline at end of file
+    return f"{draft.strip()}\n\n{completion.strip()}"
@@ -0,0 +1,134 @@
+import asyncio
+import json
+import logging
+from typing import Any, Dict, Optional
+from fastapi import WebSocket, WebSocketDisconnect
+from app.models import ChatMessage
+from app.config import active_threads
+from app.services.chat_service import process_chat
+
+# Seconds between server heartbeats on an open chat socket
+HEARTBEAT_INTERVAL = 20
+# Seconds without any client frame (answers, pings or pongs) before the socket is closed
+IDLE_TIMEOUT = 60
+
+# Errors raised when sending to a socket that has gone away: Starlette raises
+# RuntimeError after close, uvicorn raises ClientDisconnected (an OSError)
+SEND_ERRORS = (WebSocketDisconnect, RuntimeError, OSError)
+
+logger = logging.getLogger(__name__)
+
+def get_resume_state(thread_id: str) -> Dict[str, Any]:
+    """State a reconnecting client needs to continue the conversation."""
+    thread = active_threads[thread_id]
+    return {
+        "thread_id": thread_id,
+        "last_message": thread.messages[-1] if thread.messages else None,
+        "current_category": thread.current_category,
+        "current_question": thread.current_question,
+        "profile_complete": thread.profile_complete,
+        "strategy": thread.strategy
+    }
+
+def parse_frame(frame: str) -> Dict[str, Any]:
+    """
+    Read a client frame. JSON frames carry a "type" ("answer", "ping" or "pong");
+    any other text is treated as an answer.
+    """
+    try:
+        data = json.loads(frame)
+    except json.JSONDecodeError:
+        data = None
+    if not isinstance(data, dict):
+        return {"type": "answer", "message": frame}
+    return data
+
+async def handle_chat_websocket(websocket: WebSocket, thread_id: str):
+    """
+    Serve a questionnaire session bound to one thread.
+    Unknown thread ids start a new thread; known ones resume it. Answers are
+    processed in order, with the reply streamed as "token" frames followed by a
+    "message" frame holding the full reply and the next question. The server
+    pings every HEARTBEAT_INTERVAL seconds and closes sockets that stay silent
+    for IDLE_TIMEOUT seconds.
+    """
+    await websocket.accept()
+    user_id = websocket.query_params.get("userId", "")
+    loop = asyncio.get_running_loop()
+    send_lock = asyncio.Lock()
+    
+    async def send(frame: Dict[str, Any]):
+        # Heartbeats and replies are sent from different tasks
+        async with send_lock:
+            try:
+                await websocket.send_json(frame)
+            except SEND_ERRORS as error:
+                raise WebSocketDisconnect(code=1006) from error
+    
+    async def send_heartbeats():
+        try:
+            while True:
+                await asyncio.sleep(HEARTBEAT_INTERVAL)
+                await send({"type": "ping"})
+        except WebSocketDisconnect:
+            # The receive loop notices the dead peer through its idle timeout
+            return
+    
+    async def answer(message: str):
+        tokens: asyncio.Queue[Optional[str]] = asyncio.Queue()
+    
+        def on_token(token: str):
+            loop.call_soon_threadsafe(tokens.put_nowait, token)
+    
+        def run() -> Dict[str, Any]:
+            try:
+                return process_chat(ChatMessage(userId=user_id, message=message, thread_id=thread_id), on_token)
+            finally:
+                loop.call_soon_threadsafe(tokens.put_nowait, None)
+    
+        # process_chat blocks on the LLM, so run it off the event loop
+        reply = loop.run_in_executor(None, run)
+        while (token := await tokens.get()) is not None:
+            await send({"type": "token", "data": token})
+    
+        try:
+            result = await reply
+        except Exception:
+            # Provider errors may carry internal details, so the client only gets a generic message
+            logger.exception("Chat turn failed for thread %s", thread_id)
+            await send({"type": "error", "detail": "Could not process your answer. Please try again."})
+            return
+        await send({"type": "message", **result})
+    
+    heartbeat = asyncio.create_task(send_heartbeats())
+    try:
+        if thread_id in active_threads:
+            await send({"type": "resume", **get_resume_state(thread_id)})
+        else:
+            result = process_chat(ChatMessage(userId=user_id, message="", thread_id=None))
+            thread_id = result["thread_id"]
+            await send({"type": "message", **result})
+        
+        while True:
+            try:
+                text = await asyncio.wait_for(websocket.receive_text(), timeout=IDLE_TIMEOUT)
+            except asyncio.TimeoutError:
+                # No answer or pong in time: treat the peer as dead
+                try:
+                    await websocket.close(code=1001)
+                except SEND_ERRORS:
+                    pass
+                return
+            
+            frame = parse_frame(text)
+            if frame.get("type") == "ping":
+                await send({"type": "pong"})
+            elif frame.get("type") == "answer" and isinstance(frame.get("message"), str):
+                await answer(frame["message"])
+            elif frame.get("type") != "pong":
+                await send({"type": "error", "detail": "Unsupported frame."})
+    except WebSocketDisconnect:
+        # The thread stays in active_threads, so the client can reconnect and resume
+        pass
+    finally:
+        heartbeat.cancel()
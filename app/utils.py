@@ -1,4 +1,5 @@
-from typing import List
+import re
+from typing import List, Optional
 
 # Function to extract investment goals from user response
 def extract_investment_goals(response: str) -> List[str]:
@@ -23,4 +24,44 @@ def extract_investment_goals(response: str) -> List[str]:
     if not found_goals:
         return ["other"]
     
-    return found_goals 
\ No newline at end of file
+    return found_goals 
+
+# Function to read a yes/no answer from a free-text user response
+def parse_yes_no(response: str) -> Optional[bool]:
+    negative_words = {"no", "none", "nope", "never", "nothing", "zero", "n/a"}
+    negations = {"not", "don't", "haven't"}
+    positive_words = {"yes", "yeah", "yep", "sure", "definitely"}
+    # Words that may surround a negation in an entirely negative answer ("I don't have one")
+    filler_words = {"i", "have", "do", "any", "one", "really", "at", "all", "yet", "currently", "so", "far"}
+    contrast_words = {"but", "however", "although", "though", "except"}
+    
+    words = re.findall(r"[a-z/']+", response.lower())
+    if not words:
+        return None
+    
+    # An answer made only of negations and filler is a "no"
+    if (negative_words | negations) & set(words) and set(words) <= negative_words | negations | filler_words:
+        return False
+    
+    # Otherwise the first word carries the answer ("Yes, in ETFs", "No, I rent"),
+    # unless a contrasting clause follows ("None yet, but I plan to buy a car")
+    if not contrast_words & set(words):
+        if words[0] in positive_words:
+            return True
+        if words[0] in negative_words:
+            return False
+    
+    # Mixed answers ("stocks, but I don't trade options") cannot be read as a plain yes/no
+    return None
+
+
+# Function to read the first amount or percentage from a free-text user response
+def parse_amount(response: str) -> Optional[float]:
+    match = re.search(r"(\d[\d,]*(?:\.\d+)?)\s*(k|m)?\b", response.lower())
+    if not match:
+        return None
+    
+    amount = float(match.group(1).replace(",", ""))
+    # Shorthand such as "6k" or "1.5m"
+    multiplier = {"k": 1_000, "m": 1_000_000}.get(match.group(2), 1)
+    return amount * multiplier
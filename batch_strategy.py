@@ -0,0 +1,176 @@
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterator, Optional, Set
+
+# Regenerate investment strategies for stored profiles.
+#
+# Input is JSONL with one profile per line, either {"id": ..., "investment_profile": {...}}
+# or a GET /thread/{thread_id} response with a "thread_id" added. Results are appended
+# to the output JSONL as they complete; profiles that already have a strategy in the
+# output are skipped, so an interrupted run resumes where it stopped.
+#
+#   python batch_strategy.py profiles.jsonl -o strategies.jsonl --concurrency 16 --rate 5
+#   python batch_strategy.py profiles.jsonl -o strategies.jsonl --fake-llm
+
+def positive_int(value: str) -> int:
+    number = int(value)
+    if number <= 0:
+        raise argparse.ArgumentTypeError(f"must be a positive integer, got {value}")
+    return number
+
+def non_negative_float(value: str) -> float:
+    number = float(value)
+    if number < 0:
+        raise argparse.ArgumentTypeError(f"must not be negative, got {value}")
+    return number
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Generate investment strategies for stored profiles.")
+    parser.add_argument("input", help="JSONL file with one investment profile per line")
+    parser.add_argument("-o", "--output", required=True, help="JSONL file results are appended to")
+    parser.add_argument("--concurrency", type=positive_int, default=8, help="maximum strategy generations in flight")
+    parser.add_argument("--rate", type=non_negative_float, default=0, help="maximum generations started per second (0 = unlimited)")
+    parser.add_argument("--report-every", type=positive_int, default=100, help="print throughput after this many results")
+    parser.add_argument("--fake-llm", action="store_true", help="use the fake LLM instead of OpenAI")
+    return parser.parse_args()
+
+def read_completed_ids(output_path: str) -> Set[str]:
+    """Read the ids that already have a strategy in the output file."""
+    completed = set()
+    if not os.path.exists(output_path):
+        return completed
+
+    with open(output_path, encoding="utf-8") as output_file:
+        for line in output_file:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # Partially written last line of an interrupted run
+                continue
+            if "strategy" in record:
+                completed.add(str(record["id"]))
+    return completed
+
+def read_profiles(input_path: str) -> Iterator[Dict[str, Any]]:
+    """
+    Stream profiles from the input file; lines without an id use their line number.
+    Malformed lines are reported and skipped.
+    """
+    with open(input_path, encoding="utf-8") as input_file:
+        for line_number, line in enumerate(input_file, start=1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+                record_id = record.get("id", record.get("thread_id", line_number))
+                profile = record["investment_profile"]
+                if not isinstance(profile, dict):
+                    raise TypeError("investment_profile is not an object")
+            except (json.JSONDecodeError, AttributeError, KeyError, TypeError) as error:
+                # One bad line must not abort the whole run
+                print(f"Skipping malformed line {line_number}: {error!r}", file=sys.stderr)
+                continue
+            yield {"id": str(record_id), "investment_profile": profile}
+
+class RateLimiter:
+    """Spaces out calls so that at most `rate` start per second."""
+
+    def __init__(self, rate: float):
+        self.interval = 1 / rate if rate > 0 else 0
+        self.next_slot = 0.0
+        self.lock = asyncio.Lock()
+
+    async def wait(self):
+        if not self.interval:
+            return
+        async with self.lock:
+            now = time.monotonic()
+            delay = self.next_slot - now
+            self.next_slot = max(now, self.next_slot) + self.interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+async def run_batch(args: argparse.Namespace) -> Dict[str, int]:
+    from app.models import MessageHistory
+    from app.services.strategy_service import generate_investment_strategy
+
+    def generate(profile: Dict[str, Dict[str, Any]]) -> str:
+        thread = MessageHistory()
+        for category, fields in profile.items():
+            thread.investment_profile.setdefault(category, {}).update(fields)
+        return generate_investment_strategy(thread)
+
+    completed = read_completed_ids(args.output)
+    queue: asyncio.Queue[Optional[Dict[str, Any]]] = asyncio.Queue(maxsize=args.concurrency * 2)
+    rate_limiter = RateLimiter(args.rate)
+    executor = ThreadPoolExecutor(max_workers=args.concurrency)
+    loop = asyncio.get_running_loop()
+    stats = {"succeeded": 0, "failed": 0, "skipped": 0}
+    started = time.monotonic()
+
+    def report():
+        elapsed = time.monotonic() - started
+        processed = stats["succeeded"] + stats["failed"]
+        print(
+            f"{processed} processed ({stats['failed']} failed, {stats['skipped']} skipped) "
+            f"in {elapsed:.1f}s, {processed / elapsed if elapsed else 0:.2f} profiles/s",
+            file=sys.stderr
+        )
+
+    async def produce():
+        for record in read_profiles(args.input):
+            if record["id"] in completed:
+                stats["skipped"] += 1
+                continue
+            await queue.put(record)
+        for _ in range(args.concurrency):
+            await queue.put(None)
+
+    async def work(output_file):
+        while True:
+            record = await queue.get()
+            if record is None:
+                return
+
+            await rate_limiter.wait()
+            try:
+                strategy = await loop.run_in_executor(executor, generate, record["investment_profile"])
+                result = {"id": record["id"], "strategy": strategy}
+                stats["succeeded"] += 1
+            except Exception as error:
+                # Failed profiles are retried on the next run
+                result = {"id": record["id"], "error": str(error)}
+                stats["failed"] += 1
+
+            # Each result is flushed immediately so it survives an interruption
+            output_file.write(json.dumps(result) + "\n")
+            output_file.flush()
+
+            if (stats["succeeded"] + stats["failed"]) % args.report_every == 0:
+                report()
+
+    with open(args.output, "a", encoding="utf-8") as output_file:
+        try:
+            await asyncio.gather(produce(), *(work(output_file) for _ in range(args.concurrency)))
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    report()
+    return stats
+
+def main():
+    args = parse_args()
+    if args.fake_llm:
+        # Must be set before app.config is imported
+        os.environ["LLM_PROVIDER"] = "fake"
+
+    stats = asyncio.run(run_batch(args))
+    sys.exit(1 if stats["failed"] else 0)
+
+if __name__ == "__main__":
+    main()
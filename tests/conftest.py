@@ -0,0 +1,4 @@
+import os
+
+# app.config requires an OpenAI key unless the fake LLM is selected
+os.environ.setdefault("LLM_PROVIDER", "fake")
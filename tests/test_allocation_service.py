@@ -0,0 +1,77 @@
+import pytest
+from datetime import date
+from app.services.allocation_service import FEATURES, compute_allocations, profile_features
+
+def feature(category: str, field: str, answer: str) -> float:
+    return profile_features({category: {field: answer}})[FEATURES.index(field)]
+
+@pytest.mark.parametrize("field", ["decline_reaction", "market_drop_reaction"])
+@pytest.mark.parametrize("answer, expected", [
+    ("I would sell everything", 0.0),
+    ("I would not sell", 0.6),
+    ("I wouldn't panic or sell, I'd buy more", 1.0),
+    ("Hold, maybe buy more", 0.6),
+    ("Buy more, I wouldn't sell", 1.0),
+    ("I'd get nervous", 0.25)
+])
+def test_reaction_handles_negation_and_order(field, answer, expected):
+    assert feature("risk_profile", field, answer) == expected
+
+@pytest.mark.parametrize("answer, expected", [
+    ("Preserving capital", 0.0),
+    ("Maximizing profit", 1.0),
+    ("Profit, but not at the cost of capital", 1.0),
+    ("Capital preservation, not profit", 0.0),
+    ("A balance of both", 0.5)
+])
+def test_profit_vs_preservation(answer, expected):
+    assert feature("risk_profile", "profit_vs_preservation", answer) == expected
+
+@pytest.mark.parametrize("answer, expected", [
+    ("Conservative", 0.0),
+    ("Not too aggressive", 0.5),
+    ("Aggressive", 1.0)
+])
+def test_risk_tolerance(answer, expected):
+    assert feature("risk_profile", "risk_tolerance", answer) == expected
+
+@pytest.mark.parametrize("answer, expected", [
+    ("Very important", 0.0),
+    ("Not very important", 1.0),
+    ("Not important", 1.0),
+    ("Somewhat", 0.5)
+])
+def test_liquidity_importance(answer, expected):
+    assert feature("investment_preferences", "liquidity_importance", answer) == expected
+
+def test_unknown_answer_is_ignored():
+    assert compute_allocations([{}])[0]["risk_score"] == 50.0
+
+def test_batch_allocations_sum_to_100():
+    profiles = [
+        {"risk_profile": {"risk_tolerance": tolerance}, "financial_security": {"emergency_fund": fund}}
+        for tolerance in ["Conservative", "Moderate", "Aggressive"]
+        for fund in ["Yes", "No"]
+    ]
+    results = compute_allocations(profiles)
+    assert all(sum(result["allocation"].values()) == 100 for result in results)
+    assert all(result["allocation"]["cash"] >= 10 for result in results[1::2])
+    assert results[0]["risk_score"] < results[2]["risk_score"] < results[4]["risk_score"]
+
+def test_numeric_answers_score_like_text():
+    text = {"personal_info": {"age": "34"}, "risk_profile": {"acceptable_loss": "30"}}
+    numeric = {"personal_info": {"age": 34}, "risk_profile": {"acceptable_loss": 30.0}}
+    text_result, numeric_result = compute_allocations([text, numeric])
+    assert numeric_result == text_result
+    assert numeric_result["risk_score"] < 100
+
+@pytest.mark.parametrize("answer, expected", [
+    ("10 years", 0.5),
+    (10, 0.5),
+    ("18 months", 0.075),
+    (f"Until retirement in {date.today().year + 10}", 0.5),
+    ("Long-term", 0.75)
+])
+def test_investment_horizon(answer, expected):
+    features = profile_features({"investment_preferences": {"investment_duration": answer}})
+    assert features[FEATURES.index("investment_horizon")] == pytest.approx(expected)
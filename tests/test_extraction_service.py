@@ -0,0 +1,67 @@
+import pytest
+from app.models import MessageHistory
+from app.services import extraction_service
+from app.services.extraction_service import extract_fields_locally, extract_fields_with_llm, extract_profile_fields
+
+INCOME = ("current_financial_status", "monthly_income")
+EXPENSES = ("current_financial_status", "monthly_expenses")
+
+@pytest.mark.parametrize("response, answered_category", [
+    ("Yes, I make about 10 trades a month in stocks", "investment_experience"),
+    ("Yes, I make about 10 trades a month in stocks", "current_financial_status"),
+    ("I want to earn 8% a year", "short_term_goals"),
+    ("I want to earn 8% a year", "current_financial_status"),
+    ("I earn 6k a month", "personal_info")
+])
+def test_money_rules_ignore_counts_percentages_and_other_questions(response, answered_category):
+    assert INCOME not in extract_fields_locally(response, answered_category)
+
+@pytest.mark.parametrize("response, field, expected", [
+    ("I earn 6k and spend most of it", INCOME, "6k"),
+    ("We spend €4,000 a month on rent and food", EXPENSES, "€4,000"),
+    ("I make 3500 per month after taxes", INCOME, "3500"),
+    ("Making around 2000 euros", INCOME, "2000 euros")
+])
+def test_money_rules_read_amounts(response, field, expected):
+    assert extract_fields_locally(response, "current_financial_status")[field] == expected
+
+def test_risk_tolerance_only_read_from_risk_answers():
+    response = "I'm a conservative saver"
+    assert ("risk_profile", "risk_tolerance") not in extract_fields_locally(response, "investment_experience")
+    assert extract_fields_locally(response, "risk_profile")[("risk_profile", "risk_tolerance")] == "conservative"
+
+@pytest.fixture
+def llm_calls(monkeypatch):
+    calls = []
+    
+    def fake_extract(response, open_questions):
+        calls.append(response)
+        return {}
+    
+    monkeypatch.setattr(extraction_service, "extract_fields_with_llm", fake_extract)
+    return calls
+
+def test_plain_list_answer_skips_llm(llm_calls):
+    extract_profile_fields(MessageHistory(), "Stocks, ETFs and some crypto via my broker", "investment_experience")
+    assert llm_calls == []
+
+def test_answer_covering_other_categories_calls_llm(llm_calls):
+    response = "Male, 34 years old, married with two kids and we live in Kyiv"
+    extract_profile_fields(MessageHistory(), response, "personal_info")
+    assert llm_calls == []
+    
+    response = "Stocks and ETFs, and I also have a mortgage, a car loan and a small emergency fund"
+    extract_profile_fields(MessageHistory(), response, "investment_experience")
+    assert llm_calls == [response]
+
+def test_llm_failure_returns_no_fields(monkeypatch):
+    class FailingChain:
+        def __init__(self, **kwargs):
+            pass
+        
+        def run(self, **kwargs):
+            raise RuntimeError("provider unavailable")
+    
+    monkeypatch.setattr(extraction_service, "LLMChain", FailingChain)
+    open_questions = {("personal_info", "age"): "How old are you?"}
+    assert extract_fields_with_llm("I am thirty four", open_questions) == {}
@@ -0,0 +1,40 @@
+import pytest
+from app.config import INVESTMENT_QUESTIONS, SKIPPED_ANSWER
+from app.models import MessageHistory
+from app.services.questionnaire_service import get_question_field, is_question_applicable
+
+AMOUNTS_QUESTION = INVESTMENT_QUESTIONS["short_term_goals"][1]
+COVERAGE_QUESTION = INVESTMENT_QUESTIONS["financial_security"][1]
+
+def thread_with(category: str, field: str, answer):
+    thread = MessageHistory()
+    thread.investment_profile[category][field] = answer
+    return thread
+
+def test_get_question_field():
+    assert get_question_field("personal_info", "How old are you?") == "age"
+    assert get_question_field("personal_info", "Unknown question?") is None
+
+def test_questions_without_condition_are_asked():
+    assert is_question_applicable(MessageHistory(), "personal_info", "How old are you?")
+
+@pytest.mark.parametrize("answer, expected", [
+    (None, True),
+    ("Yes, three months", True),
+    ("No", False),
+    ("I don't have one", False),
+    ("Not yet, but I'm building one", True)
+])
+def test_months_coverage_depends_on_emergency_fund(answer, expected):
+    thread = thread_with("financial_security", "emergency_fund", answer)
+    assert is_question_applicable(thread, "financial_security", COVERAGE_QUESTION) is expected
+
+@pytest.mark.parametrize("answer, expected", [
+    ("Buy a car", True),
+    ("None", False),
+    ("None yet, but I plan to buy a car", True),
+    (SKIPPED_ANSWER, False)
+])
+def test_goal_follow_ups_depend_on_goals(answer, expected):
+    thread = thread_with("short_term_goals", "goals", answer)
+    assert is_question_applicable(thread, "short_term_goals", AMOUNTS_QUESTION) is expected
@@ -0,0 +1,34 @@
+import pytest
+from app.utils import parse_yes_no
+
+@pytest.mark.parametrize("answer", ["Yes", "yes, in ETFs", "Sure", "Yeah, a couple of funds"])
+def test_parse_yes_no_positive(answer):
+    assert parse_yes_no(answer) is True
+
+@pytest.mark.parametrize("answer", [
+    "No",
+    "None",
+    "No, I rent",
+    "None yet",
+    "Nothing so far",
+    "I don't have one",
+    "Not really",
+    "Not at all",
+    "n/a"
+])
+def test_parse_yes_no_negative(answer):
+    assert parse_yes_no(answer) is False
+
+@pytest.mark.parametrize("answer", [
+    "",
+    "Intermediate",
+    "Not sure",
+    "Don't know",
+    "None yet, but I plan to buy a car",
+    "No, but I'm saving for one",
+    "Yes, but only a little",
+    "I invest in stocks but I don't trade options",
+    "Buy a house, no debts"
+])
+def test_parse_yes_no_mixed_or_unclear(answer):
+    assert parse_yes_no(answer) is None